@@ -6,19 +6,141 @@
 
 # Importing the libraries
 import spacy
-from spacy import displacy
+from spacy.matcher import PhraseMatcher
+from spacy.symbols import PROPN, NOUN, VERB, ADJ, CCONJ, PUNCT, cc, punct
 import datetime
 import dateparser
 from dateparser.search import search_dates
-from fuzzywuzzy import fuzz
+from rapidfuzz import fuzz, process
 import re
+import os
+import functools
+import collections
 import logging
-import pandas as pd
+import numpy as np
 import warnings
 
 # Ignore all warnings
 warnings.filterwarnings("ignore")
 
+# The SpaCy English language model is loaded once and shared by all the Handler objects
+# The small model is enough as the Out-of Vocabulary words are checked against a word list instead of the word vectors
+# The named entity recognizer is only needed for the dates, hence is run separately for a single prompt once it gets 
+# till there (a batch of prompts is processed with it, for keeping the batching)
+_NLP = None
+DEFERRED_PIPES = ['ner']
+
+# Word list used for checking the Out-of Vocabulary words, shipped next to this file
+KNOWN_WORDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'known_words.txt')
+# Numeric dates (such as '13/12/2023') which are not recognized as numbers by Spacy
+DATE_LIKE_REGEX = re.compile(r"\d+(?:[./-]\d+)+")
+
+def get_nlp():
+  """
+  This function lets you retrieve the shared SpaCy language model, loading it on the first call.
+
+  Returns:
+  --------
+  nlp : spacy.language.Language
+      The loaded Spacy English language model.
+  """
+  global _NLP
+  if _NLP is None:
+    _NLP = spacy.load('en_core_web_sm')
+
+  return _NLP
+
+# For splitting the sentences on conjunctions
+@functools.lru_cache(maxsize=128)
+def get_split_regex(conj_words):
+  """
+  This function lets you retrieve the compiled regex for splitting a sentence on the given conjunction words.
+  Commas and full stops are always split on, using a character class instead of separate alternatives.
+
+  Parameters:
+  -----------
+  conj_words : frozenset
+      The conjunction words (such as 'and', 'or', ',', '.') found in the prompt.
+
+  Returns:
+  --------
+  split_regex : re.Pattern
+      The compiled regex for splitting the sentence.
+  """
+  # Escape special characters for regex
+  words = [re.escape(word) for word in sorted(conj_words) if word not in (',', '.')]
+  split_regex = "[,.]"
+  if len(words) > 0:
+    split_regex += r"|\b(?:" + "|".join(words) + r")\b"
+
+  return re.compile(split_regex)
+
+# Parts of speech of the words kept in the abbreviation string and dependencies of the conjunction words
+# The symbols are the integer IDs of the labels, for comparing without looking up the strings
+DESCRIPTION_POS = frozenset([PROPN, NOUN, VERB, ADJ, CCONJ, PUNCT])
+CONJUNCTION_DEPS = frozenset([cc, punct])
+
+# Synonyms for 'with'/'without'
+SYNONYMS_W = frozenset(['with', 'accompanied', 'company', 'together', 'addition', 'including', 'along', 'amidst', 'among', 'amid', 'having', 'in'])
+SYNONYMS_WO = frozenset(['without', 'lacking', 'deprived', 'not', 'missing', 'destitute', 'bereft', 'deficient', 'void', 'unaccompanied', 'except', 'exclusive'])
+
+# Formats of the complete dates which can be parsed directly, without searching through dateparser
+DATE_FORMATS = ('%Y-%m-%d', '%Y/%m/%d', '%d %B %Y', '%B %d %Y', '%d %b %Y', '%b %d %Y')
+
+# For parsing the dates
+def parse_date(text, prefer_day_of_month):
+  """
+  This function parses the date mentioned in the text, trying the known formats first and then searching through 
+  dateparser.
+
+  Parameters:
+  -----------
+  text : str
+      The text of the date entity to be parsed.
+  prefer_day_of_month : str
+      The day of the month to be preferred ('first' or 'last') if the text doesn't mention it.
+
+  Returns:
+  --------
+  date : datetime.datetime or None
+      The last date found in the text, None if no date was found.
+  """
+  # Relative dates (such as 'tomorrow' or a bare year) depend on the current date, hence it is part of the cache key
+  return _parse_date(text, prefer_day_of_month, datetime.date.today())
+
+@functools.lru_cache(maxsize=1024)
+def _parse_date(text, prefer_day_of_month, today):
+  """
+  This function parses the date mentioned in the text, with the results cached for each day.
+
+  Parameters:
+  -----------
+  text : str
+      The text of the date entity to be parsed.
+  prefer_day_of_month : str
+      The day of the month to be preferred ('first' or 'last') if the text doesn't mention it.
+  today : datetime.date
+      The current date, for which the result is cached.
+
+  Returns:
+  --------
+  date : datetime.datetime or None
+      The last date found in the text, None if no date was found.
+  """
+  for date_format in DATE_FORMATS:
+    try:
+      return datetime.datetime.strptime(text, date_format)
+    except ValueError:
+      pass
+
+  # Searching for the dates within the text, if it isn't a complete date
+  # The text is not parsed as a whole, as dateparser would read the bare numbers (such as '3') as the months
+  dates = search_dates(text, settings={'PREFER_DAY_OF_MONTH': prefer_day_of_month})
+  return dates[-1][1] if dates else None
+
+# Number of the tokens whose matched abbreviation is kept, the cache is emptied once it grows past it
+ABBREVIATION_CACHE_SIZE = 4096
+
 class Handler:
     """
     This is a brief description of what the Handler class does.
@@ -43,9 +165,19 @@ class Handler:
     --------
     init(text):
       Initializes the Handler class with the given text.
+    process_many(texts, batch_size):
+      Creates the Handler objects for multiple texts, processed in batches.
+    get_model_matcher():
+      For retreiving the phrase matcher of the sales descriptions.
+    get_known_words():
+      For retreiving the words known to the Application.
+    get_abbreviations(desc_str_brks):
+      Matches the tokens extracted from prompts to the abbreviations.
+    get_abbreviation(desc_str_brk, similarity_scores):
+      Matches the token extracted from prompts to an abbreviation.
     get_doc():
       For retreiving SpaCy document.
-    validator():
+    validator(doc):
       For validation of the given user promts feeded to the Application.
     get_model_codes(doc):
       Extracts the model codes from the SpaCy document.
@@ -57,6 +189,49 @@ class Handler:
       Generates the request body based on the extracted information.
     """
 
+    # Creating a dictionary for storing the model codes
+    # The exhaustive list can be retrieved from the database but for now can be considered to be hardcoded.
+    model_codes_dic = {
+      '21CF': 'iX xDrive50',
+      '11CF': 'iX xDrive40',
+      '21EM': 'X7 xDrive40i',
+      '21EN': 'X7 xDrive40d',
+      'DZ01': 'M8',
+      '28FF': '318i'
+    }
+
+    abbreviations_dic = {
+      'LL': 'Left-Hand Drive',
+      'RL': 'Right-Hand Drive',
+      'P337A': 'M Sport Package',
+      'P33BA': 'M Sport Package Pro',
+      'P7LGA': 'Comfort Package EU',
+      'S402A': 'Panorama Glass Roof',
+      'S407A': 'Panorama Glass Roof Sky Lounge',
+      'S403A': 'Sunroof'
+    }
+
+    # Lookup tables precomputed once from the dictionaries
+    # Phrase matcher of the sales descriptions for the exact matches, built on the first use as it needs the Spacy 
+    # vocabulary
+    _MODEL_MATCHER = None
+    # Concatenated lowercased sales descriptions, for accepting the parts of the model names in the validation
+    _MODEL_TEXT = ''.join(model_codes_dic.values()).lower()
+    # First word of the lowercased sales description and the model code, for the partial matches
+    _MODEL_FIRST_TOKENS = tuple((value.lower().split()[0], key) for key, value in model_codes_dic.items())
+
+    # Words known to the Application, built on the first use from the word list and the dictionaries
+    _KNOWN_WORDS = None
+    _KNOWN_WORDS_LOADED = False
+
+    # Normalized descriptions of the abbreviations, in reverse order so that on a tie the last (more specific) one is matched
+    _ABBREVIATION_KEYS = list(reversed(abbreviations_dic))
+    _ABBREVIATION_VALUES = [value.lower().replace(' ','') for value in reversed(list(abbreviations_dic.values()))]
+    # Lowercased words of the descriptions of the abbreviations, removed from the token once matched
+    _ABBREVIATION_WORDS = {key: tuple(value.lower().split()) for key, value in abbreviations_dic.items()}
+    # Matched abbreviation of each token already seen
+    _ABBREVIATION_CACHE = {}
+
     # Identifier
     def __init__(self, text):
       """
@@ -68,6 +243,49 @@ class Handler:
           The text to be processed by the Handler class.
       """
 
+      self._init_state(text)
+
+      # Calling methods internally
+      # The named entity recognizer is run later by get_parsed_dates, only if the prompt gets till there
+      self._run(get_nlp()(self.text, disable=DEFERRED_PIPES))
+
+    # For processing a batch of user prompts
+    @classmethod
+    def process_many(cls, texts, batch_size=64):
+      """
+      This method processes multiple user prompts in batches through the shared Spacy language model.
+
+      Parameters:
+      -----------
+      texts : list
+          The texts to be processed by the Handler class.
+      batch_size : int
+          The number of texts buffered by Spacy while processing.
+
+      Returns:
+      --------
+      handlers : generator
+          The Handler object created for each of the given texts, in the same order.
+      """
+      texts = [text.lower() for text in texts]
+      # Short prompts do not benefit from multiple processes, hence n_process is kept to 1
+      for doc, text in zip(get_nlp().pipe(texts, batch_size=batch_size, n_process=1), texts):
+        handler = cls.__new__(cls)
+        handler._init_state(text)
+        handler._run(doc)
+        yield handler
+
+    # For initializing the state of the object
+    def _init_state(self, text):
+      """
+      This method initializes the attributes of the object for the given text.
+
+      Parameters:
+      -----------
+      text : str
+          The text to be processed by the Handler class.
+      """
+
       self.text = text.lower()
       self.response = 0
       self.message = ""
@@ -76,35 +294,148 @@ class Handler:
       self.model_code = []
       self.boolean_formula = ""
 
-      # Creating a dictionary for storing the model codes
-      # The exhaustive list can be retrieved from the database but for now can be considered to be hardcoded.
-      self.model_codes_dic = {
-        '21CF': 'iX xDrive50',
-        '11CF': 'iX xDrive40',
-        '21EM': 'X7 xDrive40i',
-        '21EN': 'X7 xDrive40d',
-        'DZ01': 'M8',
-        '28FF': '318i'
-      }
-
-      self.abbreviations_dic = {
-        'LL': 'Left-Hand Drive',
-        'RL': 'Right-Hand Drive',
-        'P337A': 'M Sport Package',
-        'P33BA': 'M Sport Package Pro',
-        'P7LGA': 'Comfort Package EU',
-        'S402A': 'Panorama Glass Roof',
-        'S407A': 'Panorama Glass Roof Sky Lounge',
-        'S403A': 'Sunroof'
-      }
+    # For processing the SpaCy document
+    def _run(self, doc):
+      """
+      This method runs the validation and the information extraction on the given Spacy document.
 
-      # Calling methods internally
-      self.validator(self.get_doc())
+      Parameters:
+      -----------
+      doc : spacy.tokens.doc.Doc
+          The Spacy document object to be processed.
+      """
+      self.validator(doc)
+
+    # For retreiving the matcher of the sales descriptions
+    @classmethod
+    def get_model_matcher(cls):
+      """
+      This method lets you retrieve the phrase matcher of the sales descriptions, building it on the first call.
+
+      Parameters:
+      -----------
+      None
+
+      Returns:
+      --------
+      matcher : spacy.matcher.PhraseMatcher
+          The phrase matcher with a pattern for each sales description, labelled with its model code.
+      """
+      if cls._MODEL_MATCHER is None:
+        nlp = get_nlp()
+        matcher = PhraseMatcher(nlp.vocab, attr='LOWER')
+        for key, value in cls.model_codes_dic.items():
+          matcher.add(key, [nlp.make_doc(value)])
+        cls._MODEL_MATCHER = matcher
+
+      return cls._MODEL_MATCHER
+
+    # For retreiving the known words
+    @classmethod
+    def get_known_words(cls):
+      """
+      This method lets you retrieve the set of known words, loading it on the first call.
+
+      Parameters:
+      -----------
+      None
+
+      Returns:
+      --------
+      known_words : set or None
+          The lowercased words from the word list and the dictionaries, None if the word list is not available.
+      """
+      if not cls._KNOWN_WORDS_LOADED:
+        # The word list is looked up only once, even if it is not available
+        cls._KNOWN_WORDS_LOADED = True
+        if not os.path.exists(KNOWN_WORDS_FILE):
+          logging.warning("Word list '%s' not found, skipping the Out-of Vocabulary check", KNOWN_WORDS_FILE)
+          return None
+
+        with open(KNOWN_WORDS_FILE, encoding='utf-8', errors='ignore') as file:
+          known_words = set(file.read().lower().split())
+        for value in list(cls.model_codes_dic.values()) + list(cls.abbreviations_dic.values()):
+          known_words.update(value.lower().split())
+        cls._KNOWN_WORDS = known_words
+
+      return cls._KNOWN_WORDS
+
+    # For matching the tokens to the abbreviations
+    @classmethod
+    def get_abbreviations(cls, desc_str_brks):
+      """
+      This method matches the tokens extracted from prompts to the abbreviations with the most similar descriptions.
+      The results are cached, as the same tokens recur across the prompts, and the tokens not found in the cache are 
+      scored against every description at once.
+
+      Parameters:
+      -----------
+      desc_str_brks : list
+          The tokens extracted from prompts, with the spaces removed.
+
+      Returns:
+      --------
+      abbreviations : list
+          The matched abbreviation for each of the tokens, in the same order.
+      """
+      cache = cls._ABBREVIATION_CACHE
+      misses = list(dict.fromkeys(desc_str_brk for desc_str_brk in desc_str_brks if desc_str_brk not in cache))
+
+      if len(misses) > 0:
+        # Calculating the fuzzy similarity between every new token and every description at once
+        similarity_scores = process.cdist(misses, cls._ABBREVIATION_VALUES, scorer=fuzz.partial_ratio, dtype=np.uint8)
+        if len(cache) + len(misses) > ABBREVIATION_CACHE_SIZE:
+          cache.clear()
+        for desc_str_brk, scores in zip(misses, similarity_scores):
+          cache[desc_str_brk] = cls.get_abbreviation(desc_str_brk, scores)
+
+      return [cache[desc_str_brk] for desc_str_brk in desc_str_brks]
+
+    # For matching a token to an abbreviation
+    @classmethod
+    def get_abbreviation(cls, desc_str_brk, similarity_scores=None):
+      """
+      This method matches the token extracted from prompts to the abbreviation with the most similar description.
+
+      Parameters:
+      -----------
+      desc_str_brk : str
+          The token extracted from prompts, with the spaces removed.
+      similarity_scores : numpy.ndarray, optional
+          The fuzzy similarity between the token and each description, calculated here if not given.
+
+      Returns:
+      --------
+      key_at_index : str
+          The matched abbreviation, the last one if the token matches multiple, empty if none is matched.
+      """
+      key_at_index = ''
+      if similarity_scores is None:
+        similarity_scores = process.cdist([desc_str_brk], cls._ABBREVIATION_VALUES, scorer=fuzz.partial_ratio, dtype=np.uint8)[0]
+
+      # Setting breaking criteria
+      while similarity_scores.max() >= 85:
+        # Get the key of the highest similarity score
+        key_at_index = cls._ABBREVIATION_KEYS[np.argmax(similarity_scores)]
+
+        # Removing the found match word for next iteration
+        previous = desc_str_brk
+        for word in cls._ABBREVIATION_WORDS[key_at_index]:
+          desc_str_brk = desc_str_brk.replace(word, "", 1)
+
+        # Recalculating the fuzzy similarity for the remaining token, nothing is matched once it is empty
+        # A misspelled match (such as 'sunrof') has no words to remove, hence the same token would match again
+        if len(desc_str_brk) == 0 or desc_str_brk == previous:
+          break
+        similarity_scores = process.cdist([desc_str_brk], cls._ABBREVIATION_VALUES, scorer=fuzz.partial_ratio, dtype=np.uint8)[0]
+
+      return key_at_index
 
     # For retreiving SpaCy document
     def get_doc(self):
       """
-      This method lets you retrieve the spacy document.
+      This method lets you retrieve the spacy document, with all the components of the pipeline (including the named 
+      entities) run on it.
 
       Parameters:
       -----------
@@ -115,9 +446,8 @@ class Handler:
       doc : spacy.tokens.doc.Doc
           The Spacy document object to be processed.
       """
-      # Loading the Spacy English language model
-      nlp = spacy.load('en_core_web_md')
-      doc = nlp(self.text)
+      # Using the shared Spacy English language model
+      doc = get_nlp()(self.text)
 
       return doc
 
@@ -138,9 +468,15 @@ class Handler:
 
       try:
         # Validating the individual tokens
+        # Punctuation and numbers (including the dates such as '13/12/2023') are not expected in the word list, hence 
+        # are never considered Out-of Vocabulary
+        # The lemma is checked as well, as the word list doesn't include the inflected forms (such as 'planning')
+        known_words = self.get_known_words()
         for token in doc:
-          if token.is_oov: # This fails if you are using 'en_core_web_sm', i.e, a smaller vocabulary
-            if token.text not in ''.join(self.model_codes_dic.values()).lower():
+          if known_words is not None and not (token.is_punct or token.is_space or token.like_num
+                                              or DATE_LIKE_REGEX.fullmatch(token.text)) \
+              and token.text not in known_words and token.lemma_.lower() not in known_words:
+            if token.text not in self._MODEL_TEXT:
               self.response = 0
               message = "Prompt has some Out-of Vocabulary words: {}, Please check!".format(token.text)
               self.message += ". " + message
@@ -149,7 +485,7 @@ class Handler:
 
         # Validating the model codes
         if self.response == 1:
-          self.get_model_codes(self.get_doc())
+          self.get_model_codes(doc)
           if len(self.model_code) == 0:
             self.response = 0
             message = "Prompt doesn't include one of the sales description provided, Please check!"
@@ -157,7 +493,7 @@ class Handler:
 
         # Validating on sales description/ abbreviations
         if self.response == 1:
-          self.get_boolean_formula(self.get_doc())
+          self.get_boolean_formula(doc)
           if len(self.boolean_formula) == 0:
             self.response = 0
             message = "Prompt doesn't include a valid abbreviation description, Please check!"
@@ -165,7 +501,7 @@ class Handler:
         
         # Validation on dates
         if self.response == 1:
-          self.get_parsed_dates(self.get_doc())
+          self.get_parsed_dates(doc)
           if len(self.dates) == 0:
             self.response = 0
             message = "Prompt doesn't include a valid date, Please check!"
@@ -198,34 +534,35 @@ class Handler:
       """
 
       try:
-        # Extracting text from the SpaCy document
-        text = doc.text
-
         # Single Request Prompts
-        # Check if any of the model code values are present in the features
+        # Check if any of the model code values are present in the features, in a single pass over the tokens
         model_code = []
-
-        for value in self.model_codes_dic.values():
-          if value.lower() in text:
-            for i in self.model_codes_dic:
-              if self.model_codes_dic[i] == value:
-                model_code.append(i)
-                text = text.replace(value.lower(), "")
+        matches = self.get_model_matcher()(doc)
+        found = {doc.vocab.strings[match_id] for match_id, start, end in matches}
+
+        for key in self.model_codes_dic:
+          if key in found:
+            model_code.append(key)
+
+        # Extracting the text from the SpaCy document without the matched sales descriptions
+        pieces = []
+        last = 0
+        for match_id, start, end in sorted(matches, key=lambda match: match[1]):
+          span = doc[start:end]
+          pieces.append(doc.text[last:span.start_char])
+          last = max(last, span.end_char)
+        pieces.append(doc.text[last:])
+        text = ''.join(pieces)
 
         # Multiple Request Prompts
         # We use partial match to get multiple prompts
         if len(text) > 0:
-          for value in self.model_codes_dic.values():
-            lst = value.lower().split()
-            for v in lst:
-              # Calculate the fuzzy similarity between the token and each word in the sentence
-              similarity_scores = [fuzz.ratio(v, word) for word in text.replace(',','').split()]
-              if max(similarity_scores) == 100:
-                # If the fuzzy match score is 100, add the corresponding key to the list of model codes
-                for i in self.model_codes_dic:
-                  if self.model_codes_dic[i]==value:
-                    model_code.append(i)
-              break
+          text_tokens = set(text.replace(',','').split())
+          for token, key in self._MODEL_FIRST_TOKENS:
+            # If the first word of the sales description is present in the sentence, add the corresponding key to 
+            # the list of model codes
+            if token in text_tokens:
+              model_code.append(key)
 
         self.response = 1
 
@@ -256,96 +593,63 @@ class Handler:
       """
 
       try:
-        # Creating the token, direction and features (such as POS etc.) dataframe using parse_deps of displacy for 
-        # relationship extraction
-        features = []
-        words_df = pd.DataFrame(displacy.parse_deps(doc)['words'])
-        arcs_df = pd.DataFrame(displacy.parse_deps(doc)['arcs'])
+        # Positions of the tokens with the punctuation collapsed into the preceding word (as done by parse_deps of
+        # displacy) for measuring the length of the dependency arcs
+        positions = []
+        position, collapsed = -1, False
         for token in doc:
-          features.append({'TEXT' : token.text, 'LEMMA' : token.lemma_, 'POS' : token.pos_, 'TAG' : token.tag_, 'DEP' : token.dep_,
-                    'SHAPE' : token.shape_, 'ALPHA' : token.is_alpha, 'STOP': token.is_stop, 'OOV': token.is_oov})
-
-        fdf = pd.DataFrame(features)
+          collapsed = token.is_punct and token.i > 0 and (collapsed or not doc[token.i-1].is_punct)
+          if not collapsed:
+            position += 1
+          positions.append(position)
 
         # Abbreviation string
-        desc_str = ' '.join(list(fdf[fdf['POS'].isin(['PROPN', 'NOUN', 'VERB', 'ADJ', 'CCONJ', 'PUNCT'])]['TEXT']))
+        desc_str = ' '.join([token.text for token in doc if token.pos in DESCRIPTION_POS])
 
-        # For storing boolean formula and conjugation and adposition words
+        # For storing boolean formula and conjugation words
         boolean_formula = ""
-        conj_df = fdf[fdf['DEP'].isin(['cc', 'punct']) & fdf['TEXT'].isin(['and', 'or', ',', '.'])]
-        adp_df = words_df[words_df['tag'] == 'ADP']
+        conj_tokens = [token for token in doc if token.dep in CONJUNCTION_DEPS and token.text in {'and', 'or', ',', '.'}]
+        conj_texts = [token.text for token in conj_tokens]
+
+        # Compiling the regex once for splitting both the description string and the prompt on conjunctions
+        split_regex = get_split_regex(frozenset(conj_texts)) if len(conj_texts) > 0 else None
 
         # This block of code checks if there are conjunctions in the text and then creates a substring for further 
         # processing
-        if len(list(conj_df['TEXT'])) == 0:
+        if split_regex is None:
           split_sentence = [desc_str]
         else:
-          # Escape special characters for regex
-          split_words = [(r"\b" + re.escape(word) + r"\b") for word in list(conj_df['TEXT'])]
-          split_words.append(',')
-          split_words.append(re.escape('.'))
-          split_regex = "|".join(split_words)
           # Spliting sentence using regex
-          split_sentence = re.split(split_regex, desc_str)
+          split_sentence = split_regex.split(desc_str)
 
         # Storing the matched specifications into the list
-        abreviation_match_lst = []
-        for desc_str_brk in split_sentence:
-          desc_str_brk = ''.join(desc_str_brk.split())
-          key_at_index = ''
-          while True:
-            # Calculating the fuzzy similarity between the description and the token extracted from prompts
-            similarity_scores = []
-            for value in self.abbreviations_dic.values():
-              similarity_score = fuzz.partial_ratio(value.lower().replace(' ',''), desc_str_brk)
-              similarity_scores.append(similarity_score)
-            
-            # Setting breaking criteria
-            if max(similarity_scores) < 85:
-              break
-
-            # Get the index of the highest similarity score
-            max_index = len(similarity_scores) - similarity_scores[::-1].index(max(similarity_scores)) - 1
-            key_list = list(self.abbreviations_dic.keys())
-            key_at_index = key_list[max_index]
-
-            # Removing the found match word for next iteration
-            remove_words = self.abbreviations_dic[key_at_index].lower().split()
-            for word in remove_words:
-              desc_str_brk = desc_str_brk.replace(word, "", 1)
-
-          # Appending to the match list
-          abreviation_match_lst.append(key_at_index)
-
-        # Synonyms for 'with'/'without'
-        synonym_w = ['with', 'accompanied', 'company', 'together', 'addition', 'including', 'along', 'amidst', 'among', 'amid', 'having', 'in']
-        synonym_wo = ['without', 'lacking', 'deprived', 'not', 'missing', 'destitute', 'bereft', 'deficient', 'void', 'unaccompanied', 'except', 'exclusive']
+        abreviation_match_lst = self.get_abbreviations([''.join(desc_str_brk.split()) for desc_str_brk in split_sentence])
 
         # To check if brackets are required
         first, second = False, False  
-        if len(set(list(conj_df['TEXT'])).intersection(set(['and', 'or']))) > 1:
+        if len({'and', 'or'}.intersection(conj_texts)) > 1:
           # For placing brackets
-          brkt_df = arcs_df[arcs_df['label'] == 'cc']
-          brkt_df['diff'] = brkt_df['end'] - brkt_df['start']
-          brkt_df['needed'] = brkt_df['diff'].apply(lambda x: 1 if x>1 else 0)
+          brkt_needed = [1 if abs(positions[token.head.i] - positions[token.i]) > 1 else 0 for token in doc
+                         if token.dep == cc and token.head.i != token.i]
 
           # To check which group of specifications to bind
-          if list(brkt_df['needed'])[0] > list(brkt_df['needed'])[1]:
+          if brkt_needed[0] > brkt_needed[1]:
             second = True
           else:
             first = True
 
         # This block of code checks if there are conjunctions in the text and then creates a boolean formula accordingly
-        if len(list(conj_df['TEXT'])) == 0:
+        if split_regex is None:
           split_sentence = [self.text]
         else:
-          # Escape special characters for regex
-          split_words = [(r"\b" + re.escape(word) + r"\b") for word in list(conj_df['TEXT'])]
-          split_words.append(',')
-          split_words.append(re.escape('.'))
-          split_regex = "|".join(split_words)
           # Spliting sentence using regex
-          split_sentence = re.split(split_regex, self.text)
+          split_sentence = split_regex.split(self.text)
+
+        # Counting the matched specifications already placed in the boolean formula (including the repeated ones) 
+        # for placing the brackets
+        match_counts = collections.Counter(abreviation_match_lst)
+        placed = 0
+        already = set()
 
         opertor = ""
         bracket = ""
@@ -353,58 +657,48 @@ class Handler:
           # Check if the text fragment contains 'and' or 'or' as conjunction
           conj = ""
           if ind > 0:
-            conj = "/" if list(conj_df['TEXT'])[ind-1] == 'or' else ""
+            conj = "/" if conj_texts[ind-1] == 'or' else ""
 
           # Check if the text fragment contains a synonym for 'with' or 'without'
-          if len(set(synonym_wo).intersection(set(text.split()))) > 0:
+          words = set(text.split())
+          if len(SYNONYMS_WO & words) > 0:
             opertor = "-"
-          elif len(set(synonym_w).intersection(set(text.split()))) > 0:
+          elif len(SYNONYMS_W & words) > 0:
             opertor = "+"
           else:
             opertor = opertor
           
-          if len(abreviation_match_lst[ind])>0:
+          abreviation = abreviation_match_lst[ind]
+          if len(abreviation)>0:
             # Inserting the brackets, conjunctions and operator, if required
             if first == True:
-              tot = sum([1 if itm in boolean_formula and itm != '' else 0 for itm in abreviation_match_lst])
-              if tot == 0:
-                bracket = "("
-              else:
-                bracket = ""
+              bracket = "(" if placed == 0 else ""
             
             if second == True:
-              tot = sum([1 if itm in boolean_formula and itm != '' else 0 for itm in abreviation_match_lst])
-              if tot == 1 and len(boolean_formula)>0:
-                bracket = "("
-              else:
-                bracket = ""
+              bracket = "(" if placed == 1 and len(boolean_formula)>0 else ""
 
             boolean_formula += conj+opertor+bracket
             bracket = ""
 
             # Inserting the brackets, if required
             if first == True:
-              tot = sum([1 if itm in boolean_formula and itm != '' else 0 for itm in abreviation_match_lst])
-              if tot == 1 and len(boolean_formula)>0:
-                bracket = ")"
-              else:
-                bracket = ""
+              bracket = ")" if placed == 1 and len(boolean_formula)>0 else ""
 
             if second == True:
-              tot = sum([1 if itm in boolean_formula and itm != '' else 0 for itm in abreviation_match_lst])
-              if tot == 2 and len(boolean_formula)>0:
-                bracket = ")"
-              else:
-                bracket = ""
+              bracket = ")" if placed == 2 and len(boolean_formula)>0 else ""
+
+            if abreviation not in already:
+              already.add(abreviation)
+              placed += match_counts[abreviation]
 
-          boolean_formula += abreviation_match_lst[ind]+bracket
+          boolean_formula += abreviation+bracket
           bracket = ""
 
         # Check for all elements appended to the string
-        if sum([0 if word in boolean_formula else 1 for word in abreviation_match_lst])>0:
-          for word in abreviation_match_lst:
-            if not word in boolean_formula:
-              boolean_formula += boolean_formula[0] + word
+        for word in abreviation_match_lst:
+          if len(word)>0 and word not in already:
+            already.add(word)
+            boolean_formula += boolean_formula[0] + word
               
         # Set response flag to 1 and store the boolean formula in the object
         self.response = 1
@@ -436,18 +730,32 @@ class Handler:
       """
 
       try:
+        # Running the named entity recognizer, if not done while processing the document
+        if not doc.has_annotation('ENT_IOB'):
+          doc = get_nlp().get_pipe('ner')(doc)
+
         # Extract all entities that have the label 'DATE' and get the last one
         dt = [entity.text for entity in doc.ents if entity.label_ == "DATE" or entity.label_ == "CARDINAL"]
 
+        # If no date is mentioned, the validation reports the missing date
+        if len(dt) == 0:
+          self.response = 0
+          return
+
         # Check if the last date contains any of the keywords that indicate the start of a period
         if len(set(['late', 'latter', 'end']).intersection(set(self.text.split()))) > 0:
           # If no, prefer the last day of the month for the date extraction
-          dates = search_dates(dt[-1], settings={'PREFER_DAY_OF_MONTH': 'last'})
+          date = parse_date(dt[-1], 'last')
         else:
-          dates = search_dates(dt[-1], settings={'PREFER_DAY_OF_MONTH': 'first'})
+          date = parse_date(dt[-1], 'first')
         
+        # If the date couldn't be parsed, the validation reports the missing date
+        if date is None:
+          self.response = 0
+          return
+
         # Format the datetime object to "yyyy-mm-dd" format
-        dt = dates[-1][1].strftime('%Y-%m-%d')
+        dt = date.strftime('%Y-%m-%d')
       
         # Set response flag to 1 and store the date
         self.response = 1